@@ -1,53 +1,128 @@
 import argparse
+import functools
+import math
+import sys
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from decimal import Decimal, getcontext
-
-def sqrt_decimal(x, context):
-    # 自己实现高精度sqrt以便并发
-    getcontext().prec = context.prec
-    s = x / 2
-    last_s = None
-    while last_s != s:
-        last_s = s
-        s = (s + x / s) / 2
-    return +s  # 一元+触发decimal舍入
-
-def gauss_legendre_pi(digits, n_threads, progress_callback=None):
-    getcontext().prec = digits + 10
-    a = Decimal(1)
-    b = Decimal(1) / sqrt_decimal(Decimal(2), getcontext())
-    t = Decimal('0.25')
-    p = Decimal(1)
-
-    total_iters = int(2.5 * (digits**0.5))  # 经验足够10~30轮，100万位约25轮
-    total_iters = min(max(total_iters, 10), 40)
+from concurrent.futures import ProcessPoolExecutor
+
+import gmpy2
+from gmpy2 import mpfr, sqrt
+
+# 位数达到阈值才启用进程池并行，小规模下IPC开销得不偿失
+PARALLEL_MIN_DIGITS = 50000
+_pool = None
+
+def _get_pool():
+    # 进程池惰性创建并跨迭代复用，摊薄spawn开销
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=2)
+    return _pool
+
+def _sqrt_worker(xb, precision):
+    # 子进程中重建mpfr并开方，to_binary/from_binary比字符串序列化快
+    gmpy2.get_context().precision = precision
+    return gmpy2.to_binary(sqrt(gmpy2.from_binary(xb)))
+
+# Chudnovsky级数常数：1/π = 12 * Σ (-1)^k (6k)!(13591409+545140134k) / ((3k)!(k!)^3 640320^(3k+3/2))
+_CHUD_C3_OVER_24 = 640320**3 // 24
+
+def _leaf(a):
+    # 第a项的(P, Q, T)；各值很快超出int64（Q含640320^3/24≈1.1e16因子），
+    # 必须用Python大整数，无法下沉到定宽JIT
+    if a == 0:
+        Pab = Qab = 1
+    else:
+        Pab = (6*a - 5) * (2*a - 1) * (6*a - 1)
+        Qab = a*a*a * _CHUD_C3_OVER_24
+    Tab = Pab * (13591409 + 545140134*a)
+    return Pab, Qab, -Tab if a & 1 else Tab
+
+def _bs(a, b):
+    # 二分拆分：返回区间[a,b)的(P, Q, T)，纯整数运算；
+    # 宽度2的叶子就地展开合并，省去约一半的递归调用
+    if b - a == 1:
+        return _leaf(a)
+    if b - a == 2:
+        P1, Q1, T1 = _leaf(a)
+        P2, Q2, T2 = _leaf(a + 1)
+        return P1*P2, Q1*Q2, T1*Q2 + P1*T2
+    m = (a + b) // 2
+    P1, Q1, T1 = _bs(a, m)
+    P2, Q2, T2 = _bs(m, b)
+    return P1*P2, Q1*Q2, T1*Q2 + P1*T2
+
+def chudnovsky_pi(digits):
+    # 二分拆分把级数求和转成O(log n)次全精度整数乘法，除最后一步外无开方
+    gmpy2.get_context().precision = int((digits + 10) * 3.3219280948874)
+    n_terms = digits // 14 + 2  # 每项约贡献14.18位十进制
+    _, Q, T = _bs(0, n_terms)
+    pi = (426880 * sqrt(mpfr(10005)) * Q) / T
+    return f"{pi:.{digits}Df}"
+
+@functools.lru_cache(maxsize=8)
+def _inv_sqrt2(precision):
+    # 按精度缓存1/sqrt(2)，库方式重复调用时省下一次全精度开方
+    gmpy2.get_context().precision = precision
+    return 1 / sqrt(mpfr(2))
+
+def agm_iterations(digits):
+    # 二次收敛：k轮约得2^k位，ceil(log2(二进制位数))+2已足够，无需经验公式
+    return max(4, int(math.log2(digits * math.log2(10))) + 2)
+
+def mpmath_pi(digits):
+    # mpmath 的 mp.pi 是多年调优的实现（装有gmpy2时直接走GMP后端），
+    # 作为现成后端供对比；多取几位保护位后截断，与其他算法输出口径一致
+    from mpmath import mp
+    with mp.workdps(digits + 10):
+        return mp.nstr(+mp.pi, digits + 5, strip_zeros=False)[:digits + 2]
+
+def gauss_legendre_pi(digits, progress_callback=None):
+    # 二进制精度 ≈ 十进制位数 × log2(10)，外加保护位
+    precision = int((digits + 10) * 3.3219280948874)
+    gmpy2.get_context().precision = precision
+    use_procs = digits >= PARALLEL_MIN_DIGITS
+    a = mpfr(1)
+    b = _inv_sqrt2(precision)
+    t = mpfr('0.25')
+    p = 1  # 恒为2的幂，用int位移即可，免去每轮一次全精度乘法
+
+    total_iters = agm_iterations(digits)
 
     start_time = time.time()
     for i in range(total_iters):
-        with ThreadPoolExecutor(max_workers=n_threads) as executor:
-            futures = {}
-            futures['a_next'] = executor.submit(lambda: (a + b) / 2)
-            futures['b_next'] = executor.submit(sqrt_decimal, a * b, getcontext())
-
-            results = {}
-            for name, fut in futures.items():
-                results[name] = fut.result()
-            a_next = results['a_next']
-            b_next = results['b_next']
-
-        t -= p * (a - a_next) ** 2
+        # a - (a+b)/2 = (a-b)/2，diff算一次两处复用，省一次全精度减法
+        diff = (a - b) / 2
+        if use_procs:
+            # 子进程算sqrt(a*b)，主进程同时更新均值，两者真正并行
+            fut = _get_pool().submit(_sqrt_worker, gmpy2.to_binary(a * b), precision)
+            a_next = a - diff
+            b_next = gmpy2.from_binary(fut.result())
+        else:
+            # GIL下线程无法并行bignum运算，直接顺序计算
+            a_next = a - diff
+            b_next = sqrt(a * b)
+
+        t -= p * diff * diff
         a = a_next
         b = b_next
-        p *= 2
+        p <<= 1
 
         if progress_callback:
             elapsed = time.time() - start_time
             est_digits = int((i + 1) / total_iters * digits)
             progress_callback(i + 1, total_iters, est_digits, elapsed)
-    pi = ((a + b) ** 2) / (4 * t)
-    return str(+pi)[:digits + 2]
+    s = a + b
+    pi = (s * s) / (4 * t)  # s*s跳过通用pow分派，4是int由gmpy2按小整数处理
+    return f"{pi:.{digits}Df}"  # D=向下舍入，直接输出"3."加digits位小数
+
+def write_result(pi_str, out=sys.stdout, chunk_size=65536):
+    # 分块写出，避免为百万位结果再拼一个完整f-string（峰值内存省约一半）
+    for i in range(0, len(pi_str), chunk_size):
+        out.write(pi_str[i:i + chunk_size])
+    out.write('\n')
+    out.flush()
 
 def progress_bar(cur, total, width=30):
     f = cur / total
@@ -55,39 +130,53 @@ def progress_bar(cur, total, width=30):
     bar = '=' * left + '>' + '.' * (width - left - 1)
     return f"[{bar}] {100*f:.2f}%"
 
-def progress_thread_fn(state, total_digits, total_iters):
+def progress_thread_fn(state, total_digits, total_iters, update_event):
+    # 事件驱动：有新进度立即被唤醒，否则最多1秒刷新一次，避免0.2秒轮询抢GIL
     while not state['done']:
+        update_event.wait(timeout=1.0)
+        update_event.clear()
         i = state['iter']
         est_digits = state['digits']
         elapsed = state['elapsed']
         print(
-            f"\r迭代: {i}/{total_iters}  线程: {state['threads']}  "
+            f"\r迭代: {i}/{total_iters}  "
             f"已计算位数: {est_digits}  用时: {elapsed:.2f}s  "
             f"{progress_bar(i, total_iters)}",
             end='', flush=True
         )
-        time.sleep(0.2)
     print()  # 换行
 
 def main():
     parser = argparse.ArgumentParser(description='多线程高斯-勒让德算法计算π')
     parser.add_argument('--digits', type=int, default=1000, help='计算π的精度（小数位数）')
-    parser.add_argument('--threads', type=int, default=10, help='并行线程数')
+    parser.add_argument('--threads', type=int, default=10,
+                        help='（已废弃，仅保留兼容）GIL下线程无法加速bignum运算')
+    parser.add_argument('--algo', choices=['chudnovsky', 'gauss-legendre', 'mpmath'],
+                        default='chudnovsky',
+                        help='算法选择，默认Chudnovsky二分拆分；mpmath需要pip install mpmath')
     args = parser.parse_args()
 
+    if args.algo in ('chudnovsky', 'mpmath'):
+        t1 = time.time()
+        pi = chudnovsky_pi(args.digits) if args.algo == 'chudnovsky' else mpmath_pi(args.digits)
+        t2 = time.time()
+        print(f"计算完成，总用时 {t2-t1:.2f}s")
+        print(f"π的前{args.digits}位：")
+        write_result(pi)
+        return
+
     state = {
         'iter': 0,
         'digits': 0,
         'elapsed': 0,
-        'threads': args.threads,
         'done': False
     }
-    total_iters = int(2.5 * (args.digits**0.5))
-    total_iters = min(max(total_iters, 10), 40)
+    total_iters = agm_iterations(args.digits)
+    update_event = threading.Event()
 
     t = threading.Thread(
         target=progress_thread_fn,
-        args=(state, args.digits, total_iters),
+        args=(state, args.digits, total_iters, update_event),
         daemon=True
     )
     t.start()
@@ -96,15 +185,18 @@ def main():
         state['iter'] = i
         state['digits'] = est_digits
         state['elapsed'] = elapsed
+        update_event.set()
 
     t1 = time.time()
-    pi = gauss_legendre_pi(args.digits, args.threads, progress_callback)
+    pi = gauss_legendre_pi(args.digits, progress_callback)
     t2 = time.time()
     state['done'] = True
-    time.sleep(0.3)
+    update_event.set()
+    t.join(timeout=1.0)
 
     print(f"计算完成，总用时 {t2-t1:.2f}s")
-    print(f"π的前{args.digits}位：\n{pi}")
+    print(f"π的前{args.digits}位：")
+    write_result(pi)
 
 if __name__ == '__main__':
     main()
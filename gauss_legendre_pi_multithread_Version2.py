@@ -1,78 +1,134 @@
 import argparse
+import functools
+import math
+import sys
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from decimal import Decimal, getcontext
+from decimal import ROUND_DOWN, Decimal, localcontext
 
 def sqrt_decimal(x, context):
     """
-    高精度开方，使用牛顿迭代法实现，以支持 decimal 多线程环境下的高精度 sqrt。
+    高精度开方，使用精度自适应的牛顿迭代法实现，以支持 decimal 多线程环境下的高精度 sqrt。
+    从浮点种子（约15位正确）起步，每轮迭代把工作精度翻倍，使每一步的计算量
+    与当前已正确的位数相称；总代价约为两次全精度除法，而非每步都在全精度下做除法。
     参数:
         x: 要开方的 Decimal 数
-        context: decimal.Context 对象，决定精度
+        context: decimal.Context 对象，决定目标精度；须为当前线程激活的上下文
+                 （算术运算符查的是激活上下文）
     返回:
         Decimal: x 的平方根
     """
-    getcontext().prec = context.prec    # 设置当前线程 decimal 精度
-    s = x / 2                           # 初始猜测
-    last_s = None
-    while last_s != s:                  # 牛顿迭代
-        last_s = s
+    target_prec = context.prec
+    ctx = context                           # 直接用调用方传入的激活上下文
+    try:
+        seed = math.sqrt(float(x))
+    except (OverflowError, ValueError):
+        seed = 0.0
+    if seed > 0 and math.isfinite(seed):
+        s = Decimal(repr(seed))             # 浮点种子，约15位有效数字
+    else:
+        # x 超出 float 范围：写成 x = m·10^(2k)，对 m 开方后指数折半，
+        # 种子同样有约15位正确，保证下方固定步数的精度阶梯成立
+        k = (x.adjusted() + 1) // 2
+        m = x.scaleb(-2 * k)
+        s = Decimal(repr(math.sqrt(float(m)))).scaleb(k)
+    working_prec = 16
+    while working_prec < target_prec:       # 逐级提升精度的牛顿迭代
+        working_prec = min(target_prec, 2 * working_prec + 8)
+        ctx.prec = working_prec
         s = (s + x / s) / 2
-    return +s                           # 一元+触发 decimal 的舍入
+    # 精度阶梯的最后一步已在目标精度下执行，再打磨一步即达满精度；
+    # 固定步数免去原先每轮一次的 O(n) 大数相等比较
+    s = (s + x / s) / 2
+    return +s                               # 一元+触发 decimal 的舍入
 
-def gauss_legendre_pi(digits, n_threads, progress_callback=None):
+@functools.lru_cache(maxsize=8)
+def _inv_sqrt2(prec):
     """
-    使用高斯-勒让德算法并行计算高精度π。
+    返回 1/sqrt(2)，按精度 prec 记忆化。
+    作为库被反复调用时，百万位下 sqrt(2) 本身就要数秒，值得跨调用缓存。
+    参数:
+        prec: decimal 精度（有效位数）
+    返回:
+        Decimal: 1/sqrt(2)
+    """
+    with localcontext() as ctx:
+        ctx.prec = prec
+        return Decimal(1) / sqrt_decimal(Decimal(2), ctx)
+
+def agm_iterations(digits):
+    """
+    估算高斯-勒让德算法所需迭代轮数。
+    算法二次收敛（k 轮约得 2^k 位），ceil(log2(二进制位数))+2 已足够，
+    原先的 2.5*sqrt(digits) 经验公式会多算近一倍的轮数。
+    参数:
+        digits: 目标小数位数
+    返回:
+        int: 迭代轮数
+    """
+    return max(4, int(math.log2(digits * math.log2(10))) + 2)
+
+def gauss_legendre_pi(digits, progress_callback=None):
+    """
+    使用高斯-勒让德算法计算高精度π。
     参数:
         digits: 小数精度（位数）
-        n_threads: 并行线程数
         progress_callback: 进度回调函数，每次迭代时调用，用于展示进度
     返回:
         str: 计算得出的π，字符串形式，保留 digits 位
     """
-    # 设置 decimal 精度
-    getcontext().prec = digits + 10
-
-    # 初始化算法变量
-    a = Decimal(1)
-    b = Decimal(1) / sqrt_decimal(Decimal(2), getcontext())
-    t = Decimal('0.25')
-    p = Decimal(1)
-
-    # 预估迭代轮数（经验公式）
-    total_iters = int(2.5 * (digits**0.5))      # 经验公式，100万位约25轮
-    total_iters = min(max(total_iters, 10), 40) # 迭代次数限制在10~40之间
-
-    start_time = time.time()
-    for i in range(total_iters):
-        # 用线程池并发计算 a_next 和 b_next
-        with ThreadPoolExecutor(max_workers=n_threads) as executor:
-            futures = {}
-            futures['a_next'] = executor.submit(lambda: (a + b) / 2)
-            futures['b_next'] = executor.submit(sqrt_decimal, a * b, getcontext())
-
-            results = {}
-            for name, fut in futures.items():
-                results[name] = fut.result()
-            a_next = results['a_next']
-            b_next = results['b_next']
-
-        # 按算法更新变量
-        t -= p * (a - a_next) ** 2
-        a = a_next
-        b = b_next
-        p *= 2
-
-        # 进度回调
-        if progress_callback:
-            elapsed = time.time() - start_time
-            est_digits = int((i + 1) / total_iters * digits)
-            progress_callback(i + 1, total_iters, est_digits, elapsed)
-
-    # 最终π计算
-    pi = ((a + b) ** 2) / (4 * t)
-    return str(+pi)[:digits + 2]   # 字符串截取，保留 digits 位（含"3."）
+    # 局部上下文内设精度，退出时自动还原，不污染调用方的 decimal 上下文
+    with localcontext() as ctx:
+        ctx.prec = digits + 10
+
+        # 初始化算法变量
+        a = Decimal(1)
+        b = _inv_sqrt2(digits + 10)
+        t = Decimal('0.25')
+        p = 1  # 恒为2的幂，用 int 位移即可，int×Decimal 远比 Decimal×Decimal 便宜
+
+        # 预估迭代轮数（对数上界）
+        total_iters = agm_iterations(digits)
+
+        start_time = time.time()
+        for i in range(total_iters):
+            # GIL 下 Decimal 运算无法真正并行，线程池只增加开销，直接顺序计算；
+            # 利用 a - (a+b)/2 = (a-b)/2，diff 算一次两处复用，省一次全精度减法
+            diff = (a - b) / 2
+            a_next = a - diff
+            b_next = sqrt_decimal(a * b, ctx)
+
+            # 按算法更新变量
+            t -= p * diff * diff
+            a = a_next
+            b = b_next
+            p <<= 1
+
+            # 进度回调
+            if progress_callback:
+                elapsed = time.time() - start_time
+                est_digits = int((i + 1) / total_iters * digits)
+                progress_callback(i + 1, total_iters, est_digits, elapsed)
+
+        # 最终π计算：s*s 跳过通用 pow 分派，4 是 int，int×Decimal 从轻处理
+        s = a + b
+        pi = (s * s) / (4 * t)
+        # quantize 先截到 digits 位小数再转字符串，避免先生成含保护位的整串再切片
+        return str(pi.quantize(Decimal(1).scaleb(-digits), rounding=ROUND_DOWN))
+
+def write_result(pi_str, out=sys.stdout, chunk_size=65536):
+    """
+    把结果字符串分块写到输出流。
+    避免为百万位结果再拼接一个完整 f-string（峰值字符串内存省约一半）。
+    参数:
+        pi_str: π 的字符串结果
+        out: 输出流，默认 sys.stdout
+        chunk_size: 每块字符数
+    """
+    for i in range(0, len(pi_str), chunk_size):
+        out.write(pi_str[i:i + chunk_size])
+    out.write('\n')
+    out.flush()
 
 def progress_bar(cur, total, width=30):
     """
@@ -89,25 +145,28 @@ def progress_bar(cur, total, width=30):
     bar = '=' * left + '>' + '.' * (width - left - 1)
     return f"[{bar}] {100*f:.2f}%"
 
-def progress_thread_fn(state, total_digits, total_iters):
+def progress_thread_fn(state, total_digits, total_iters, update_event):
     """
-    进度条显示线程函数，实时打印迭代进度
+    进度条显示线程函数，事件驱动地打印迭代进度：
+    有新进度时立即被唤醒，否则最多 1 秒刷新一次，避免固定轮询与计算线程抢 GIL。
     参数:
         state: dict, 包含当前迭代数、估算位数、用时等信息
         total_digits: 总精度
         total_iters: 总迭代次数
+        update_event: threading.Event, 进度回调每次更新后置位
     """
     while not state['done']:
+        update_event.wait(timeout=1.0)
+        update_event.clear()
         i = state['iter']
         est_digits = state['digits']
         elapsed = state['elapsed']
         print(
-            f"\r迭代: {i}/{total_iters}  线程: {state['threads']}  "
+            f"\r迭代: {i}/{total_iters}  "
             f"已计算位数: {est_digits}  用时: {elapsed:.2f}s  "
             f"{progress_bar(i, total_iters)}",
             end='', flush=True
         )
-        time.sleep(0.2)
     print()  # 换行
 
 def main():
@@ -120,7 +179,8 @@ def main():
     """
     parser = argparse.ArgumentParser(description='多线程高斯-勒让德算法计算π')
     parser.add_argument('--digits', type=int, default=1000, help='计算π的精度（小数位数）')
-    parser.add_argument('--threads', type=int, default=10, help='并行线程数')
+    parser.add_argument('--threads', type=int, default=10,
+                        help='（已废弃，仅保留兼容）GIL 下线程无法加速 Decimal 运算')
     args = parser.parse_args()
 
     # 用 state 记录进度信息
@@ -128,35 +188,37 @@ def main():
         'iter': 0,
         'digits': 0,
         'elapsed': 0,
-        'threads': args.threads,
         'done': False
     }
-    total_iters = int(2.5 * (args.digits**0.5))
-    total_iters = min(max(total_iters, 10), 40)
+    total_iters = agm_iterations(args.digits)
+    update_event = threading.Event()
 
     # 启动进度条线程
     t = threading.Thread(
         target=progress_thread_fn,
-        args=(state, args.digits, total_iters),
+        args=(state, args.digits, total_iters, update_event),
         daemon=True
     )
     t.start()
 
-    # 进度回调函数，更新 state
+    # 进度回调函数，更新 state 并唤醒进度线程
     def progress_callback(i, n, est_digits, elapsed):
         state['iter'] = i
         state['digits'] = est_digits
         state['elapsed'] = elapsed
+        update_event.set()
 
     # 开始计算π
     t1 = time.time()
-    pi = gauss_legendre_pi(args.digits, args.threads, progress_callback)
+    pi = gauss_legendre_pi(args.digits, progress_callback)
     t2 = time.time()
     state['done'] = True
-    time.sleep(0.3)  # 确保进度线程最后一次刷新
+    update_event.set()      # 唤醒进度线程做最后一次刷新
+    t.join(timeout=1.0)
 
     print(f"计算完成，总用时 {t2-t1:.2f}s")
-    print(f"π的前{args.digits}位：\n{pi}")
+    print(f"π的前{args.digits}位：")
+    write_result(pi)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file